@@ -0,0 +1,235 @@
+"""Requests/s and p99 latency of the read pages under gunicorn, SERVER_MODE=sync vs asgi, at equal memory.
+
+asgi always runs the single worker that gunicorn.conf.py allows it, so it runs first
+and its peak RSS (the server and all its processes) sets the memory budget. sync then
+gets as many workers as fit in that budget: a one-worker sync server is warmed up at
+the highest concurrency, the RSS of its master and of its worker are read, and
+
+    workers = max(1, floor((asgi RSS - master RSS) / worker RSS))
+
+Each run reports its server's RSS and req/s per MB next to the raw req/s, since the
+worker count can only match the budget to within one worker. --workers N skips the
+sizing and runs N sync workers. Logged-in clients keep a connection open and loop
+over the dashboard, the notifications page and one group page, at each concurrency
+level in turn.
+
+    python benchmarks/asgi_vs_wsgi.py --seconds 10 --concurrency 8,64
+
+Set --database-url to run against PostgreSQL instead of a throwaway SQLite file.
+Linux only (the RSS is read from /proc).
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app(database_url):
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['DEBUG'] = 'False'
+    sys.path.insert(0, REPO_DIR)
+    os.chdir(REPO_DIR)
+    import app
+    return app
+
+
+def seed(database_url, users, bugs):
+    app = load_app(database_url)
+    from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+    from django.contrib.sessions.backends.db import SessionStore
+    from django.core.management import call_command
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.migrate_schema()
+    owner = app.User.objects.create_user(username='bench-owner', password='x')
+    group = app.BugGroup.objects.create(name='bench', description='', created_by=owner)
+    app.Bug.objects.bulk_create([
+        app.Bug(title=f'Seed bug {i}', description='lorem ipsum ' * 20, status='Open', created_by=owner.username, group_id=group.id)
+        for i in range(bugs)
+    ], batch_size=1000)
+    session_keys = []
+    for i in range(users):
+        user = owner if i == 0 else app.User.objects.create_user(username=f'bench-{i}', password='x')
+        with app.connection.cursor() as cursor:
+            cursor.execute('INSERT INTO bug_groups_members (buggroup_id, user_id) VALUES (%s, %s)', (group.id, user.id))
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.id)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        session_keys.append(session.session_key)
+    return group.id, session_keys
+
+
+def process_rss_mb(pid):
+    with contextlib.suppress(OSError), open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0
+
+
+def server_rss_mb(pid):
+    """Resident memory of a process and all its descendants"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            with contextlib.suppress(OSError), open(f'/proc/{entry}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+                children.setdefault(ppid, []).append(int(entry))
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        pending.extend(children.get(current, []))
+        total += process_rss_mb(current)
+    return total
+
+
+async def fetch(reader, writer, path, session_key):
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: bench\r\nCookie: sessionid={session_key}\r\n\r\n'.encode()
+    )
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = 0
+    for line in head.split(b'\r\n'):
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':', 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def client(port, paths, session_key, deadline, latencies, failures):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        i = 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            status = await fetch(reader, writer, paths[i % len(paths)], session_key)
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                failures.append(status)
+            i += 1
+    finally:
+        writer.close()
+
+
+async def drive(port, paths, session_keys, concurrency, seconds):
+    latencies, failures = [], []
+    deadline = time.monotonic() + seconds
+    await asyncio.gather(*(
+        client(port, paths, session_keys[i % len(session_keys)], deadline, latencies, failures)
+        for i in range(concurrency)
+    ))
+    latencies.sort()
+    return {
+        'rps': len(latencies) / seconds,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else float('nan'),
+        'errors': len(failures),
+    }
+
+
+def wait_for_port(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with contextlib.suppress(OSError), socket.create_connection(('127.0.0.1', port)):
+            return
+        time.sleep(0.2)
+    raise RuntimeError(f'server did not start on port {port}')
+
+
+@contextlib.contextmanager
+def gunicorn(mode, workers, args, database_url):
+    env = dict(os.environ, SERVER_MODE=mode, WEB_CONCURRENCY=str(workers), PORT=str(args.port),
+               DATABASE_URL=database_url, DEBUG='False')
+    server = subprocess.Popen(['gunicorn'], cwd=REPO_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(args.port)
+        yield server
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+
+def bench_paths(group_id):
+    return ['/', '/notifications/', f'/group/{group_id}/']
+
+
+def sync_workers_for(budget_mb, args, database_url, group_id, session_keys):
+    """How many sync workers fit in budget_mb: measured on a warmed-up one-worker server"""
+    with gunicorn('sync', 1, args, database_url) as server:
+        asyncio.run(drive(args.port, bench_paths(group_id), session_keys, max(args.concurrency), 2))
+        master_mb = process_rss_mb(server.pid)
+        worker_mb = server_rss_mb(server.pid) - master_mb
+    return max(1, int((budget_mb - master_mb) // worker_mb)), master_mb, worker_mb
+
+
+def run_mode(mode, workers, args, database_url, group_id, session_keys):
+    with gunicorn(mode, workers, args, database_url) as server:
+        paths = bench_paths(group_id)
+        asyncio.run(drive(args.port, paths, session_keys, 4, 1))  # warm up every worker
+        results = []
+        for concurrency in args.concurrency:
+            r = asyncio.run(drive(args.port, paths, session_keys, concurrency, args.seconds))
+            r.update(mode=mode, workers=workers, concurrency=concurrency, rss_mb=server_rss_mb(server.pid))
+            results.append(r)
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, help="sync workers (default: as many as fit in the asgi run's peak RSS)")
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--concurrency', default='8,64', help='comma-separated open connections per run')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--bugs', type=int, default=5000, help='bugs seeded into the group')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--modes', default='asgi,sync', help='asgi runs first: its RSS sizes the sync run')
+    parser.add_argument('--database-url', help='an empty database to seed (default: a temporary SQLite file)')
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(',')]
+
+    workdir = tempfile.mkdtemp(prefix='bench-asgi-')
+    database_url = args.database_url or f'sqlite:///{workdir}/db.sqlite3'
+    try:
+        with multiprocessing.get_context('spawn').Pool(1) as pool:
+            group_id, session_keys = pool.apply(seed, (database_url, args.users, args.bugs))
+
+        modes = sorted(args.modes.split(','), key=lambda mode: mode != 'asgi')
+        if 'sync' in modes and args.workers is None and 'asgi' not in modes:
+            parser.error('sizing the sync run needs the asgi run; add asgi to --modes or pass --workers')
+
+        print(f"{args.seconds:g}s per run, {args.users} users, {args.bugs} seeded bugs\n")
+        print(f"{'mode':<6}{'workers':>8}{'clients':>9}{'req/s':>10}{'p99 ms':>10}{'errors':>8}{'RSS MB':>9}{'req/s/MB':>10}")
+        budget_mb = None
+        for mode in modes:
+            workers = 1
+            if mode == 'sync':
+                workers = args.workers
+                if workers is None:
+                    workers, master_mb, worker_mb = sync_workers_for(budget_mb, args, database_url, group_id, session_keys)
+                    print(f"(sync sized to the asgi peak of {budget_mb:.0f} MB: master {master_mb:.0f} MB + {workers} x {worker_mb:.0f} MB per worker)")
+            results = run_mode(mode, workers, args, database_url, group_id, session_keys)
+            if mode == 'asgi':
+                budget_mb = max(r['rss_mb'] for r in results)
+            for r in results:
+                print(f"{r['mode']:<6}{r['workers']:>8}{r['concurrency']:>9}{r['rps']:>10.0f}{r['p99_ms']:>10.1f}{r['errors']:>8}"
+                      f"{r['rss_mb']:>9.0f}{r['rps'] / r['rss_mb']:>10.2f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
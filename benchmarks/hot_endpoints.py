@@ -0,0 +1,370 @@
+"""Requests/s, p50/p95/p99 latency and SQL statements per request of the hot read endpoints.
+
+Seeds a throwaway database at the requested scale (users, groups, memberships, bugs,
+invitations, payments), then measures every endpoint in ENDPOINTS, one at a time:
+
+    inprocess   calls the WSGI `application` directly from one thread, so the numbers
+                are the per-request cost of Django + the view + the database
+    gunicorn    the same requests over keep-alive connections to a real gunicorn
+                (gunicorn.conf.py, SERVER_MODE=sync) at --concurrency open clients
+
+Statement counts come from the RequestMetricsMiddleware registry of the in-process
+run; gunicorn runs the same code path, so they are only reported once. Results are
+written as JSON. With --baseline, every (mode, endpoint) is compared with an earlier
+run, and the script exits with status 1 when one regressed by more than --tolerance
+(lower req/s, higher p95) or runs more statements than before.
+
+    python benchmarks/hot_endpoints.py --bugs 50000 --seconds 5 --output before.json
+    python benchmarks/hot_endpoints.py --bugs 50000 --seconds 5 --baseline before.json
+
+Set --database-url to run against an empty PostgreSQL database instead of SQLite.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from asgi_vs_wsgi import fetch, wait_for_port
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (name, path); {group_id} is the seeded group every benchmark user belongs to
+ENDPOINTS = [
+    ('home', '/'),
+    ('notifications', '/notifications/'),
+    ('group_bugs', '/group/{group_id}/'),
+    ('group_bugs_open', '/group/{group_id}/?status=Open'),
+    ('group_search', '/group/{group_id}/search/?q=crash+login'),
+    ('group_planner', '/group/{group_id}/planner/'),
+    ('api_groups', '/api/v1/groups/'),
+    ('api_group_bugs', '/api/v1/groups/{group_id}/bugs/'),
+]
+
+TITLE_WORDS = ['crash', 'login', 'timeout', 'layout', 'export', 'upload', 'search', 'payment', 'mobile', 'slow']
+
+
+def load_app(database_url):
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['DEBUG'] = 'False'
+    sys.path.insert(0, REPO_DIR)
+    os.chdir(REPO_DIR)
+    import app
+    return app
+
+
+def seed(database_url, args):
+    """Fill an empty database; returns the hot group id and one session key per client user"""
+    app = load_app(database_url)
+    from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+    from django.contrib.sessions.backends.db import SessionStore
+    from django.core.management import call_command
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.migrate_schema()
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+
+    app.User.objects.bulk_create([app.User(username=f'bench-{i}', password='!') for i in range(args.users)], batch_size=1000)
+    user_ids = list(app.User.objects.order_by('id').values_list('id', flat=True))
+    app.BugGroup.objects.bulk_create([
+        app.BugGroup(name=f'Group {i}', description='benchmark group', created_by_id=user_ids[i % len(user_ids)])
+        for i in range(args.groups)
+    ], batch_size=1000)
+    group_ids = list(app.BugGroup.objects.order_by('id').values_list('id', flat=True))
+    hot_group = group_ids[0]
+    creators = {group_id: user_ids[i % len(user_ids)] for i, group_id in enumerate(group_ids)}
+
+    # Everyone is in the hot group plus groups_per_user - 1 others; creators are admins
+    members = {group_id: set() for group_id in group_ids}
+    for user_id in user_ids:
+        members[hot_group].add(user_id)
+        for group_id in rng.sample(group_ids[1:], min(args.groups_per_user - 1, len(group_ids) - 1)):
+            members[group_id].add(user_id)
+    for group_id, creator in creators.items():
+        members[group_id].add(creator)
+    developers = {group_id: [u for u in sorted(ids) if rng.random() < 0.2] for group_id, ids in members.items()}
+    with app.connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO bug_groups_members (buggroup_id, user_id, role) VALUES (%s, %s, %s)',
+            [(group_id, user_id, 'developer' if user_id in developers[group_id] else 'member')
+             for group_id, ids in members.items() for user_id in ids],
+        )
+        cursor.executemany(
+            'INSERT INTO bug_groups_admins (buggroup_id, user_id) VALUES (%s, %s)',
+            list(creators.items()),
+        )
+
+    # Half the bugs land in the hot group, the rest anywhere
+    statuses = app.BUG_STATUSES
+    weights = [6 if status in app.OPEN_BUG_STATUSES else 1 for status in statuses]
+    for start in range(0, args.bugs, 1000):
+        batch = []
+        for _ in range(start, min(start + 1000, args.bugs)):
+            group_id = hot_group if rng.random() < 0.5 else rng.choice(group_ids)
+            due = now + timedelta(days=rng.randint(-14, 14)) if rng.random() < 0.3 else None
+            assignee = rng.choice(developers[group_id]) if developers[group_id] and rng.random() < 0.4 else None
+            batch.append(app.Bug(
+                title=f'{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_WORDS)} issue',
+                description=' '.join(rng.choices(TITLE_WORDS, k=30)),
+                status=rng.choices(statuses, weights)[0],
+                created_by=f'bench-{rng.randrange(args.users)}',
+                group_id=group_id,
+                due_date=due,
+                estimated_hours=rng.randint(1, 16) if due else None,
+                assigned_to_id=assignee,
+            ))
+        app.Bug.objects.bulk_create(batch)
+
+    # From groups the user is not in; fewer than asked for when most users are in every group
+    invitations = set()
+    for _ in range(args.invitations * 20):
+        if len(invitations) == args.invitations:
+            break
+        group_id, user_id = rng.choice(group_ids), rng.choice(user_ids)
+        if user_id not in members[group_id]:
+            invitations.add((group_id, user_id))
+    app.GroupInvitation.objects.bulk_create([
+        app.GroupInvitation(group_id=group_id, invited_by_id=creators[group_id],
+                            invited_user_id=user_id, status=rng.choices(['pending', 'accepted', 'declined'], [7, 2, 1])[0])
+        for group_id, user_id in invitations
+    ], batch_size=1000)
+    app.Payment.objects.bulk_create([
+        app.Payment(user_id=rng.choice(user_ids), order_id=f'order_bench_{i}', payment_session_id=f'session_{i}',
+                    amount=rng.choice([1, 2]), plan=rng.choice(['basic', 'premium']),
+                    status=rng.choices(['success', 'failed', 'pending'], [6, 1, 1])[0])
+        for i in range(args.payments)
+    ], batch_size=1000)
+
+    session_keys = []
+    for user in app.User.objects.filter(id__in=user_ids[:args.clients]):
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.id)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        session_keys.append(session.session_key)
+    return hot_group, session_keys
+
+
+def summarize(mode, name, path, latencies, errors, seconds, queries=None):
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[max(int(len(latencies) * p) - 1, 0)] * 1000 if latencies else None
+
+    return {
+        'mode': mode,
+        'endpoint': name,
+        'path': path,
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / seconds,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'queries_per_request': queries,
+    }
+
+
+def wsgi_get(application, path, session_key):
+    path_info, _, query = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path_info, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'bench', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'bench', 'HTTP_COOKIE': f'sessionid={session_key}',
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    status = []
+    body = application(environ, lambda s, headers, exc_info=None: status.append(s))
+    try:
+        for _ in body:
+            pass
+    finally:
+        body.close()
+    return int(status[0].split(' ', 1)[0])
+
+
+def statement_totals(app):
+    """(statements, requests) recorded so far by the metrics middleware"""
+    _, histograms = app.request_metrics.collect()
+    statements = requests = 0
+    for (name, _), series in histograms.items():
+        if name == 'bugtracker_request_db_queries':
+            statements += series[-1]
+            requests += sum(series[:-1])
+    return statements, requests
+
+
+def run_inprocess(database_url, paths, session_keys, seconds, warmup):
+    app = load_app(database_url)
+    results = []
+    for name, path in paths:
+        for phase_seconds in (warmup, seconds):
+            before = statement_totals(app)
+            latencies, errors, i = [], 0, 0
+            deadline = time.monotonic() + phase_seconds
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                status = wsgi_get(app.application, path, session_keys[i % len(session_keys)])
+                if status == 200:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    errors += 1
+                i += 1
+        statements, requests = (a - b for a, b in zip(statement_totals(app), before))
+        results.append(summarize('inprocess', name, path, latencies, errors, seconds, statements / requests if requests else None))
+    return results
+
+
+async def client(port, path, session_key, deadline, latencies, failures):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            status = await fetch(reader, writer, path, session_key)
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                failures.append(status)
+    finally:
+        writer.close()
+
+
+async def drive(port, path, session_keys, concurrency, seconds):
+    latencies, failures = [], []
+    deadline = time.monotonic() + seconds
+    await asyncio.gather(*(
+        client(port, path, session_keys[i % len(session_keys)], deadline, latencies, failures)
+        for i in range(concurrency)
+    ))
+    return latencies, len(failures)
+
+
+def run_gunicorn(database_url, paths, session_keys, args):
+    env = dict(os.environ, SERVER_MODE='sync', WEB_CONCURRENCY=str(args.workers), PORT=str(args.port),
+               DATABASE_URL=database_url, DEBUG='False')
+    server = subprocess.Popen(['gunicorn'], cwd=REPO_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(args.port)
+        results = []
+        for name, path in paths:
+            asyncio.run(drive(args.port, path, session_keys, args.concurrency, args.warmup))
+            latencies, errors = asyncio.run(drive(args.port, path, session_keys, args.concurrency, args.seconds))
+            results.append(summarize('gunicorn', name, path, latencies, errors, args.seconds))
+        return results
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+
+def find_regressions(results, baseline, tolerance):
+    previous = {(r['mode'], r['endpoint']): r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        old = previous.get((r['mode'], r['endpoint']))
+        if old is None:
+            continue
+        key = f"{r['mode']}/{r['endpoint']}"
+        if old['rps'] and r['rps'] < old['rps'] * (1 - tolerance):
+            regressions.append(f"{key}: {r['rps']:.0f} req/s, was {old['rps']:.0f}")
+        if old['p95_ms'] and r['p95_ms'] and r['p95_ms'] > old['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {r['p95_ms']:.1f} ms, was {old['p95_ms']:.1f}")
+        if old['queries_per_request'] is not None and r['queries_per_request'] is not None \
+                and r['queries_per_request'] > old['queries_per_request'] + 0.01:
+            regressions.append(f"{key}: {r['queries_per_request']:.1f} statements/request, was {old['queries_per_request']:.1f}")
+    return regressions
+
+
+def git_revision():
+    with contextlib.suppress(OSError, subprocess.CalledProcessError):
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, text=True, stderr=subprocess.DEVNULL).strip()
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--groups', type=int, default=50)
+    parser.add_argument('--groups-per-user', type=int, default=5, help='memberships per user, the hot group included')
+    parser.add_argument('--bugs', type=int, default=20000, help='half of them in the hot group')
+    parser.add_argument('--invitations', type=int, default=2000)
+    parser.add_argument('--payments', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=20, help='logged-in users the requests rotate through')
+    parser.add_argument('--seconds', type=float, default=5, help='measured time per endpoint and mode')
+    parser.add_argument('--warmup', type=float, default=1, help='unmeasured time per endpoint and mode')
+    parser.add_argument('--modes', default='inprocess,gunicorn')
+    parser.add_argument('--endpoints', help='comma-separated subset of: ' + ', '.join(name for name, _ in ENDPOINTS))
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers')
+    parser.add_argument('--concurrency', type=int, default=16, help='open connections to gunicorn')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--database-url', help='an empty database to seed (default: a temporary SQLite file)')
+    parser.add_argument('--output', help='results file (default: hot-endpoints-<timestamp>.json)')
+    parser.add_argument('--baseline', help='an earlier results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='allowed slowdown before a regression is flagged')
+    args = parser.parse_args()
+    modes = args.modes.split(',')
+    selected = set(args.endpoints.split(',')) if args.endpoints else None
+
+    workdir = tempfile.mkdtemp(prefix='bench-hot-')
+    database_url = args.database_url or f'sqlite:///{workdir}/db.sqlite3'
+    results = []
+    try:
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(1) as pool:
+            group_id, session_keys = pool.apply(seed, (database_url, args))
+        paths = [(name, path.format(group_id=group_id)) for name, path in ENDPOINTS if selected is None or name in selected]
+        if 'inprocess' in modes:
+            with ctx.Pool(1) as pool:
+                results += pool.apply(run_inprocess, (database_url, paths, session_keys, args.seconds, args.warmup))
+        if 'gunicorn' in modes:
+            results += run_gunicorn(database_url, paths, session_keys, args)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.users} users, {args.groups} groups, {args.bugs} bugs; {args.seconds:g}s per endpoint\n")
+    print(f"{'mode':<10}{'endpoint':<18}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'SQL/req':>9}{'errors':>8}")
+    for r in results:
+        ms = [f"{r[k]:>9.1f}" if r[k] is not None else f"{'-':>9}" for k in ('p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request')]
+        print(f"{r['mode']:<10}{r['endpoint']:<18}{r['rps']:>9.0f}{''.join(ms)}{r['errors']:>8}")
+
+    output = args.output or f"hot-endpoints-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json"
+    with open(output, 'w') as f:
+        json.dump({
+            'meta': {
+                'revision': git_revision(),
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'database': 'postgresql' if args.database_url else 'sqlite',
+                'db_profile': os.getenv('DB_PROFILE', 'default'),
+                'python': platform.python_version(),
+                'cpus': os.cpu_count(),
+                'args': vars(args),
+            },
+            'results': results,
+        }, f, indent=2)
+    print(f"\n✓ Results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"⚠ {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"✓ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Concurrent read/write throughput of the tracker's SQLite database, per DB_PROFILE.
+
+Each worker process imports app.py the way a gunicorn worker does and runs a mix
+of the group page reads (access roster + one bug page) and bug submissions (quota
+UPDATE + INSERT in one transaction) against a freshly seeded database. Connections
+are recycled after every operation exactly like the request/response cycle does,
+so CONN_MAX_AGE is exercised too.
+
+    python benchmarks/sqlite_profile.py --workers 4 --seconds 10 --write-ratio 0.2
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_app(profile, workdir):
+    os.environ['DB_PROFILE'] = profile
+    os.environ['DEBUG'] = 'False'
+    os.chdir(workdir)  # the database NAME is relative to the working directory
+    sys.path.insert(0, REPO_DIR)
+    import app
+    return app
+
+
+def seed(profile, workdir, bugs):
+    app = load_app(profile, workdir)
+    from django.core.management import call_command
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.migrate_schema()
+    owner = app.User.objects.create_user(username='bench-owner', password='x')
+    group = app.BugGroup.objects.create(name='bench', description='', created_by=owner)
+    with app.connection.cursor() as cursor:
+        cursor.execute('INSERT INTO bug_groups_members (buggroup_id, user_id) VALUES (%s, %s)', (group.id, owner.id))
+        cursor.execute('''
+            INSERT INTO user_subscriptions (user_id, plan, bugs_per_day, bugs_used_today, last_reset_date, subscription_expires)
+            VALUES (%s, 'premium', -1, 0, %s, '2999-01-01')
+        ''', (owner.id, app.date.today().isoformat()))
+    app.Bug.objects.bulk_create([
+        app.Bug(title=f'Seed bug {i}', description='lorem ipsum ' * 20, status='Open', created_by=owner.username, group_id=group.id)
+        for i in range(bugs)
+    ], batch_size=1000)
+    return owner.id, group.id
+
+
+def worker(profile, workdir, user_id, group_id, seconds, write_ratio, results):
+    app = load_app(profile, workdir)
+    from django.db import close_old_connections, OperationalError
+    rng = random.Random(os.getpid())
+    reads = writes = errors = 0
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            if rng.random() < write_ratio:
+                with app.transaction.atomic():
+                    app.consume_bug_quota(user_id)
+                    app.Bug.objects.create(title='bench', description='bench write', status='Open', created_by='bench', group_id=group_id)
+                writes += 1
+            else:
+                with app.connection.cursor() as cursor:
+                    cursor.execute(app.GROUP_ROSTER_SQL, (group_id,))
+                    cursor.fetchall()
+                app.get_bug_page(group_id)
+                reads += 1
+            latencies.append(time.perf_counter() - started)
+        except OperationalError:
+            errors += 1
+        close_old_connections()  # what request_finished does
+    results.put((reads, writes, errors, latencies))
+
+
+def run_profile(profile, args):
+    workdir = tempfile.mkdtemp(prefix=f'bench-{profile}-')
+    try:
+        ctx = multiprocessing.get_context('spawn')
+        with ctx.Pool(1) as pool:
+            user_id, group_id = pool.apply(seed, (profile, workdir, args.bugs))
+        results = ctx.Queue()
+        procs = [
+            ctx.Process(target=worker, args=(profile, workdir, user_id, group_id, args.seconds, args.write_ratio, results))
+            for _ in range(args.workers)
+        ]
+        for proc in procs:
+            proc.start()
+        totals = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    reads = sum(t[0] for t in totals)
+    writes = sum(t[1] for t in totals)
+    errors = sum(t[2] for t in totals)
+    latencies = sorted(l for t in totals for l in t[3])
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else float('nan')
+    return {
+        'profile': profile,
+        'reads_per_s': reads / args.seconds,
+        'writes_per_s': writes / args.seconds,
+        'errors': errors,
+        'p99_ms': p99,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    parser.add_argument('--bugs', type=int, default=20000, help='bugs seeded into the group')
+    parser.add_argument('--profiles', default='default,production')
+    args = parser.parse_args()
+
+    print(f"{args.workers} workers, {args.seconds:g}s, {args.write_ratio:.0%} writes, {args.bugs} seeded bugs\n")
+    print(f"{'profile':<12}{'reads/s':>10}{'writes/s':>10}{'errors':>8}{'p99 ms':>10}")
+    for profile in args.profiles.split(','):
+        r = run_profile(profile, args)
+        print(f"{r['profile']:<12}{r['reads_per_s']:>10.0f}{r['writes_per_s']:>10.0f}{r['errors']:>8}{r['p99_ms']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Cold start of the tracker: import time of app.py and time to the first response.
+
+    import      `python -X importtime -c "import app"`: app's cumulative import time and
+                the slowest modules it imports directly
+    first       a fresh interpreter imports app and answers GET / through the WSGI
+                `application`, the way a new worker serves its first request
+    gunicorn    from spawning gunicorn (gunicorn.conf.py, one worker) to its first 200
+                on GET /, per SERVER_MODE
+
+Every measurement is repeated --runs times and the median is reported. The database is
+a throwaway SQLite file, migrated once up front with `python app.py migrate`.
+
+    python benchmarks/startup.py --runs 5 --output startup.json
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_RESPONSE = '''
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+from wsgiref.util import setup_testing_defaults
+environ = {}
+setup_testing_defaults(environ)
+status = []
+body = app.application(environ, lambda s, headers, exc_info=None: status.append(s))
+b''.join(body)
+body.close()
+print(json.dumps({'import_s': imported - started, 'first_response_s': time.perf_counter() - started, 'status': status[0]}))
+'''
+
+
+def import_profile(env):
+    """(app's cumulative import seconds, {direct import: cumulative seconds})"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=REPO_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    total, direct = None, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() == 'app':
+            total = int(cumulative) / 1e6
+        elif depth == 1:
+            direct[name.strip()] = int(cumulative) / 1e6
+    return total, direct
+
+
+def first_response(env):
+    result = subprocess.run([sys.executable, '-c', FIRST_RESPONSE], cwd=REPO_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def gunicorn_first_response(env, mode, port, timeout=60):
+    started = time.perf_counter()
+    server = subprocess.Popen(['gunicorn'], cwd=REPO_DIR, env=dict(env, SERVER_MODE=mode, WEB_CONCURRENCY='1', PORT=str(port)),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+                conn.request('GET', '/')
+                if conn.getresponse().status == 200:
+                    return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+            finally:
+                conn.close()
+        raise RuntimeError(f'gunicorn ({mode}) did not answer on port {port}')
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help='slowest direct imports to list')
+    parser.add_argument('--modes', default='sync,asgi', help='gunicorn SERVER_MODEs to start')
+    parser.add_argument('--port', type=int, default=8767)
+    parser.add_argument('--output', help='also write the results as JSON')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench-startup-')
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{workdir}/db.sqlite3', DEBUG='False')
+    try:
+        subprocess.run([sys.executable, 'app.py', 'migrate', '--run-syncdb'], cwd=REPO_DIR, env=env,
+                       stdout=subprocess.DEVNULL, check=True)
+        profiles = [import_profile(env) for _ in range(args.runs)]
+        firsts = [first_response(env) for _ in range(args.runs)]
+        servers = {mode: [gunicorn_first_response(env, mode, args.port) for _ in range(args.runs)]
+                   for mode in args.modes.split(',') if mode}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    direct = {name: statistics.median(p[1].get(name, 0) for p in profiles) for name in profiles[0][1]}
+    results = {
+        'import_s': statistics.median(p[0] for p in profiles),
+        'slowest_imports': dict(sorted(direct.items(), key=lambda item: -item[1])[:args.top]),
+        'inprocess_import_s': statistics.median(f['import_s'] for f in firsts),
+        'inprocess_first_response_s': statistics.median(f['first_response_s'] for f in firsts),
+        'gunicorn_first_response_s': {mode: statistics.median(times) for mode, times in servers.items()},
+    }
+
+    print(f"median of {args.runs} runs\n")
+    print(f"{'import app (-X importtime)':<36}{results['import_s'] * 1000:>9.0f} ms")
+    for name, seconds in results['slowest_imports'].items():
+        print(f"  {name:<34}{seconds * 1000:>9.0f} ms")
+    print(f"{'import app (wall clock)':<36}{results['inprocess_import_s'] * 1000:>9.0f} ms")
+    print(f"{'import + first WSGI response':<36}{results['inprocess_first_response_s'] * 1000:>9.0f} ms")
+    for mode, seconds in results['gunicorn_first_response_s'].items():
+        print(f"{f'gunicorn {mode}: spawn to first 200':<36}{seconds * 1000:>9.0f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'meta': {'runs': args.runs, 'python': sys.version.split()[0]}, 'results': results}, f, indent=2)
+        print(f"\n✓ Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
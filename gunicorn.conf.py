@@ -0,0 +1,34 @@
+"""Gunicorn deployment profiles, picked with SERVER_MODE.
+
+    sync  (default)  app:application under gthread workers - every request holds a
+                     thread for its whole life, including time spent waiting on the DB
+    asgi             app:asgi_application under one uvicorn worker - the async views
+                     (home, notifications, group page reads, live events) wait on the
+                     DB without holding a thread, so one worker serves many slow clients
+
+sync runs WEB_CONCURRENCY worker processes. asgi always runs exactly one: the live
+event broker is per process, so a stream open on one worker would never see bugs
+written through another. It scales with tasks on its event loop instead.
+"""
+import os
+
+SERVER_MODE = os.getenv('SERVER_MODE', 'sync')
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+
+if SERVER_MODE == 'asgi':
+    if os.getenv('WEB_CONCURRENCY') and workers != 1:
+        print(f"⚠ SERVER_MODE=asgi runs one worker (the live event broker is per process); ignoring WEB_CONCURRENCY={workers}")
+    workers = 1
+    wsgi_app = 'app:asgi_application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    # The open event streams of a worker are drained on restart, not cut mid-write
+    graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '10'))
+elif SERVER_MODE == 'sync':
+    wsgi_app = 'app:application'
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', '4'))
+else:
+    raise RuntimeError(f"Unknown SERVER_MODE {SERVER_MODE!r} (expected 'sync' or 'asgi')")
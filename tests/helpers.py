@@ -0,0 +1,74 @@
+"""Shared setup for the test modules: import the app and give each module a test database.
+
+Every module calls setup_database() from setUpModule and teardown_database() from
+tearDownModule. On SQLite that is an in-memory database; when DATABASE_URL points at
+a PostgreSQL server, Django creates a throwaway test_<name> database there. The schema
+is built the way a deploy builds it, with `migrate --run-syncdb` and then the
+SCHEMA_MIGRATIONS.
+"""
+import contextlib
+import io
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DEBUG', 'False')
+sys.path.insert(0, REPO_DIR)
+os.chdir(REPO_DIR)  # templates are found relative to the working directory
+
+import app
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+_names = itertools.count()
+_state = {}
+
+
+def setup_database():
+    setup_test_environment()
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']  # fast, for tests only
+    _state['media'] = settings.MEDIA_ROOT = tempfile.mkdtemp(prefix='tracker-media-')
+    _state['db_name'] = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.migrate_schema()
+    cache.clear()
+
+
+def teardown_database():
+    connections.close_all()
+    connection.creation.destroy_test_db(_state['db_name'], verbosity=0)
+    shutil.rmtree(_state['media'], ignore_errors=True)
+    teardown_test_environment()
+
+
+def unique_name(prefix):
+    return f'{prefix}{next(_names)}'
+
+
+def make_user(prefix='user'):
+    return app.User.objects.create_user(unique_name(prefix), password='pw')
+
+
+def client_for(user):
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def make_group(owner, *members, admins=()):
+    """A group created by `owner` (an admin), with the given members joined directly"""
+    group = app.BugGroup.objects.create(name=unique_name('group'), description='', created_by=owner)
+    with connection.cursor() as cursor:
+        for user in (owner, *members):
+            cursor.execute('INSERT INTO bug_groups_members (buggroup_id, user_id) VALUES (%s, %s)', [group.id, user.id])
+        for user in (owner, *admins):
+            cursor.execute('INSERT INTO bug_groups_admins (buggroup_id, user_id) VALUES (%s, %s)', [group.id, user.id])
+    app.invalidate_group_access(group.id)
+    return group
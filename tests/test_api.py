@@ -0,0 +1,67 @@
+"""The JSON API's conditional GETs: an unchanged resource is a 304."""
+import unittest
+
+from helpers import app, client_for, make_group, make_user, setup_database, teardown_database
+
+
+def setUpModule():
+    setup_database()
+
+
+def tearDownModule():
+    teardown_database()
+
+
+class ConditionalGetTests(unittest.TestCase):
+    def setUp(self):
+        self.user = make_user('api')
+        self.client = client_for(self.user)
+        self.group = make_group(self.user)
+        self.url = f'/api/v1/groups/{self.group.id}/bugs/'
+        self.add_bug('First')
+
+    def add_bug(self, title):
+        app.Bug.objects.create(title=title, description='', status='Open', created_by=self.user.username, group_id=self.group.id)
+
+    def test_bugs_not_modified_until_the_group_changes(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual([bug['title'] for bug in first.json()['data']], ['First'])
+        etag = first['ETag']
+
+        again = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual((again['ETag'], again.content), (etag, b''))
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': f'"other", {etag}'}).status_code, 304)
+
+        self.add_bug('Second')
+        changed = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+        self.assertEqual(len(changed.json()['data']), 2)
+
+    def test_etag_depends_on_the_query(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, {'fields': 'id,title'}, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['data'][0]), {'id', 'title'})
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.url)['Last-Modified']
+        self.assertEqual(self.client.get(self.url, headers={'If-Modified-Since': last_modified}).status_code, 304)
+        self.assertEqual(self.client.get(self.url, headers={'If-Modified-Since': 'Thu, 01 Jan 2015 00:00:00 GMT'}).status_code, 200)
+
+    def test_groups_hash_their_body(self):
+        url = '/api/v1/groups/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+        make_group(self.user)
+        app.invalidate_dashboards(self.user.id)
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_outsiders_get_a_404(self):
+        self.assertEqual(client_for(make_user('outsider')).get(self.url).status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""The home page cache as two workers see it: each worker has its own cache instance."""
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from helpers import app, make_group, make_user, setup_database, teardown_database
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def setUpModule():
+    setup_database()
+
+
+def tearDownModule():
+    teardown_database()
+
+
+class TwoWorkerTests(unittest.TestCase):
+    def setUp(self):
+        self.user = make_user('dash')
+
+    def as_worker(self, worker_cache):
+        return mock.patch.object(app, 'cache', worker_cache)
+
+    def group_count(self, worker_cache):
+        with self.as_worker(worker_cache):
+            return len(app.get_dashboard(self.user.id)['groups'])
+
+    def join_group_on(self, worker_cache):
+        """What create_group does: the write, then the invalidation, on the worker that served it"""
+        make_group(self.user)
+        with self.as_worker(worker_cache):
+            app.invalidate_dashboards(self.user.id)
+
+    def test_locmem_staleness_is_bounded_by_the_ttl(self):
+        self.assertFalse(app.SHARED_CACHE)
+        self.assertLessEqual(app.DASHBOARD_CACHE_TTL, 5)
+        first, second = LocMemCache('worker-1', {}), LocMemCache('worker-2', {})
+        self.assertEqual((self.group_count(first), self.group_count(second)), (0, 0))
+        self.join_group_on(first)
+        self.assertEqual(self.group_count(first), 1)
+        self.assertEqual(self.group_count(second), 0)  # the invalidation did not reach it
+
+        later = time.time() + app.DASHBOARD_CACHE_TTL + 1
+        with mock.patch('time.time', return_value=later):
+            self.assertEqual(self.group_count(second), 1)
+
+    def test_a_shared_cache_sees_the_invalidation_at_once(self):
+        with tempfile.TemporaryDirectory() as path:
+            first, second = FileBasedCache(path, {}), FileBasedCache(path, {})
+            self.assertEqual((self.group_count(first), self.group_count(second)), (0, 0))
+            self.join_group_on(first)
+            self.assertEqual(self.group_count(second), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
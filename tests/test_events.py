@@ -0,0 +1,72 @@
+"""Live group events: the stream sends each row rendered by the server for its page."""
+import asyncio
+import json
+import unittest
+from datetime import datetime
+
+from helpers import app, make_group, make_user, setup_database, teardown_database
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.test import AsyncClient
+from django.utils.dateformat import format as date_format
+from django.utils.timezone import localtime, make_aware
+
+
+def setUpModule():
+    setup_database()
+
+
+def tearDownModule():
+    teardown_database()
+
+
+class GroupEventsTests(unittest.TestCase):
+    def setUp(self):
+        self.user = make_user('live')
+        self.group = make_group(self.user)
+        self.client = AsyncClient()
+        self.client.force_login(self.user)
+
+    def add_bug(self):
+        bug = app.Bug.objects.create(
+            title='Live <bug>', description='', status='Open', created_by=self.user.username, group_id=self.group.id,
+            due_date=make_aware(datetime(2026, 3, 1, 23, 30)),
+        )
+        app.publish_bug_event(self.group.id, 'bug_created', bug.id)  # autocommit: publishes at once
+        return bug
+
+    def next_event(self, page):
+        async def scenario():
+            response = await self.client.get(f'/group/{self.group.id}/events/', {'next': page})
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            chunks = aiter(response.streaming_content)
+            self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+            bug = await sync_to_async(self.add_bug)()
+            message = (await asyncio.wait_for(anext(chunks), 5)).decode()
+            await chunks.aclose()
+            await sync_to_async(connections.close_all)()  # the thread the sync parts ran on
+            return bug, message
+        return asyncio.run(scenario())
+
+    def test_bug_created_carries_the_rendered_row(self):
+        page = f'/group/{self.group.id}/?status=Open'
+        bug, message = self.next_event(page)
+        event, data = message.split('\n')[1], json.loads(message.split('\n')[2][len('data: '):])
+        self.assertEqual(event, 'event: bug_created')
+        self.assertEqual((data['id'], data['status']), (bug.id, 'Open'))
+        row = data['row']
+        self.assertIn(f'data-bug-id="{bug.id}"', row)
+        self.assertIn('Live &lt;bug&gt;', row)
+        self.assertIn(date_format(localtime(bug.due_date), 'M d, Y'), row)  # in TIME_ZONE, like the page
+        self.assertNotIn(app.BUG_ROW_CSRF_MARKER, row)
+        self.assertNotIn(app.BUG_ROW_NEXT_MARKER, row)
+        self.assertIn('name="csrfmiddlewaretoken" value="', row)
+        self.assertIn(f'name="next" value="/group/{self.group.id}/?status=Open"', row)
+
+    def test_next_must_stay_in_the_group(self):
+        _, message = self.next_event('https://evil.example/')
+        self.assertIn(f'name=\\"next\\" value=\\"/group/{self.group.id}/\\"', message)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Bulk import: a bad row is reported by line and costs only itself."""
+import io
+import json
+import unittest
+
+from helpers import app, client_for, make_group, make_user, setup_database, teardown_database
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+
+
+def setUpModule():
+    setup_database()
+
+
+def tearDownModule():
+    teardown_database()
+
+
+class ImportTests(unittest.TestCase):
+    def setUp(self):
+        self.admin, self.member = make_user('admin'), make_user('member')
+        self.group = make_group(self.admin, self.member)
+
+    def upload(self, user, name, content, **data):
+        data['file'] = SimpleUploadedFile(name, content.encode())
+        return client_for(user).post(f'/group/{self.group.id}/bugs/import/', data)
+
+    def titles(self):
+        return sorted(app.Bug.objects.filter(group_id=self.group.id).values_list('title', flat=True))
+
+    def test_csv_rows_fail_one_by_one(self):
+        content = (
+            'title,status,estimated_hours,due_date\n'
+            'Good one,Open,3,2026-01-31\n'
+            ',Open,,\n'
+            'Bad status,Wontfix,,\n'
+            'Bad hours,Open,lots,\n'
+            f'Huge hours,Open,{app.BUG_MAX_ESTIMATED_HOURS + 1},\n'
+            'Bad date,Open,,someday\n'
+            'Good two,Closed,,\n'
+        )
+        result = self.upload(self.admin, 'bugs.csv', content).json()
+        self.assertEqual((result['imported'], result['failed']), (2, 5))
+        self.assertEqual([error['line'] for error in result['errors']], [3, 4, 5, 6, 7])
+        self.assertIn('title is required', result['errors'][0]['error'])
+        self.assertEqual(self.titles(), ['Good one', 'Good two'])
+
+    def test_ndjson_bad_lines(self):
+        lines = [json.dumps({'title': 'Imported'}), '{not json', json.dumps(['a list']), '', json.dumps({'title': 'x' * 201})]
+        result = self.upload(self.admin, 'bugs.ndjson', '\n'.join(lines)).json()
+        self.assertEqual((result['imported'], result['failed']), (1, 3))
+        self.assertEqual([error['line'] for error in result['errors']], [2, 3, 5])
+        self.assertEqual(self.titles(), ['Imported'])
+
+    def test_database_rejects_only_the_bad_row(self):
+        rows = [{'title': f'Batch bug {i}'} for i in range(5)]
+        if connection.vendor == 'postgresql':
+            rows[2]['description'] = 'nul \x00 byte'  # text columns cannot hold NUL
+        else:
+            rows[2]['due_date'] = '9999-12-31T23:00:00-05:00'  # past year 9999 once converted to UTC
+        content = io.BytesIO('\n'.join(json.dumps(row) for row in rows).encode())
+        result = app.import_bugs(self.group.id, content, 'ndjson', self.admin.username, batch_size=10)
+        self.assertEqual((result['imported'], result['failed']), (4, 1))
+        self.assertEqual(result['errors'][0]['line'], 3)
+        self.assertIn('rejected by the database', result['errors'][0]['error'])
+        self.assertNotIn('Batch bug 2', self.titles())
+
+    def test_admins_only(self):
+        response = self.upload(self.member, 'bugs.csv', 'title\nSneaky\n')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.titles(), [])
+
+    def test_unreadable_upload(self):
+        response = client_for(self.admin).post(f'/group/{self.group.id}/bugs/import/', {
+            'file': SimpleUploadedFile('bugs.csv', b'title\n\xff\xfe broken\n'),
+        })
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
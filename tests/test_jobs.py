@@ -0,0 +1,118 @@
+"""The job worker: failed jobs are retried with backoff and parked as dead when out of attempts."""
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+from helpers import app, setup_database, teardown_database
+from django.db import connection
+
+
+def setUpModule():
+    setup_database()
+
+
+def tearDownModule():
+    teardown_database()
+
+
+class WorkerTests(unittest.TestCase):
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM jobs')
+        self.calls = []
+        self.failures_left = 0
+        handlers = dict(app.JOB_HANDLERS, flaky=self.flaky)
+        for patcher in (
+            mock.patch.object(app, 'JOB_HANDLERS', handlers),
+            mock.patch.object(app, 'JOB_BACKOFF_BASE', 0),  # retry at once
+            mock.patch.object(app, 'JOB_MAX_ATTEMPTS', 3),
+            mock.patch('signal.signal'),  # leave the test runner's handlers alone
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def flaky(self, n):
+        self.calls.append(n)
+        if self.failures_left:
+            self.failures_left -= 1
+            raise RuntimeError('flaked')
+
+    def run_worker(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            app.worker(concurrency=2, pool='thread', until_empty=True)
+        return output.getvalue()
+
+    def jobs(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT status, attempts, last_error FROM jobs ORDER BY id')
+            return cursor.fetchall()
+
+    def test_success_deletes_the_job(self):
+        app.enqueue_jobs('flaky', [{'n': 1}, {'n': 2}])
+        self.assertIn('2 done, 0 to retry, 0 dead', self.run_worker())
+        self.assertEqual(sorted(self.calls), [1, 2])
+        self.assertEqual(self.jobs(), [])
+
+    def test_retried_until_it_succeeds(self):
+        self.failures_left = 2
+        app.enqueue_job('flaky', {'n': 1})
+        self.assertIn('1 done, 2 to retry, 0 dead', self.run_worker())
+        self.assertEqual(self.calls, [1, 1, 1])
+        self.assertEqual(self.jobs(), [])
+
+    def test_backoff_delays_the_retry(self):
+        self.failures_left = 1
+        app.enqueue_job('flaky', {'n': 1})
+        with mock.patch.object(app, 'JOB_BACKOFF_BASE', 3600), mock.patch('random.uniform', return_value=3600):
+            self.run_worker()
+        self.assertEqual(self.calls, [1])
+        self.assertEqual(self.jobs(), [('queued', 1, 'RuntimeError: flaked')])
+
+    def test_dead_after_max_attempts_until_requeued(self):
+        self.failures_left = 10
+        app.enqueue_job('flaky', {'n': 1})
+        self.assertIn('0 done, 2 to retry, 1 dead', self.run_worker())
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(self.jobs(), [('dead', 3, 'RuntimeError: flaked')])
+
+        self.run_worker()  # dead jobs are left alone
+        self.assertEqual(len(self.calls), 3)
+
+        self.failures_left = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            app.retry_dead_jobs('flaky')
+        self.assertEqual(self.jobs(), [('queued', 0, 'RuntimeError: flaked')])
+        self.assertIn('1 done', self.run_worker())
+        self.assertEqual(self.jobs(), [])
+
+    def test_expired_lease_on_the_last_attempt(self):
+        app.enqueue_job('flaky', {'n': 1})
+        # A worker claimed it for the last time and died: its lease is over
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE jobs SET status = 'running', attempts = max_attempts, locked_by = 'gone:1'")
+        self.assertIn('1 dead', self.run_worker())
+        self.assertEqual(self.calls, [])
+        self.assertEqual(self.jobs(), [('dead', 4, 'lease expired on the last attempt')])
+
+
+class CommandArgsTests(unittest.TestCase):
+    def parse(self, *argv):
+        with contextlib.redirect_stderr(io.StringIO()):
+            return app.parse_command_args('worker', list(argv))
+
+    def test_converted_to_the_defaults_types(self):
+        self.assertEqual(self.parse(), {'concurrency': app.JOB_WORKER_CONCURRENCY, 'pool': app.JOB_WORKER_POOL, 'until_empty': False})
+        self.assertEqual(self.parse('8', 'process', 'False'), {'concurrency': 8, 'pool': 'process', 'until_empty': False})
+        for value, expected in [('true', True), ('1', True), ('yes', True), ('off', False), ('0', False)]:
+            self.assertIs(self.parse('1', 'thread', value)['until_empty'], expected)
+
+    def test_bad_values_are_refused(self):
+        for argv in [('four',), ('1', 'thread', 'maybe'), ('1', 'thread', 'true', 'extra')]:
+            with self.assertRaises(SystemExit):
+                self.parse(*argv)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Payment webhooks: the signature check and the once-only settlement behind it."""
+import base64
+import contextlib
+import hashlib
+import hmac
+import io
+import json
+import time
+import unittest
+from unittest import mock
+
+from helpers import app, make_user, setup_database, teardown_database, unique_name
+from django.test import Client
+
+SECRET = 'webhook-test-secret'
+
+
+def setUpModule():
+    setup_database()
+
+
+def tearDownModule():
+    teardown_database()
+
+
+def sign(body, timestamp, secret=SECRET):
+    return base64.b64encode(hmac.new(secret.encode(), timestamp.encode() + body, hashlib.sha256).digest()).decode()
+
+
+@mock.patch.object(app, 'CASHFREE_WEBHOOK_SECRET', SECRET)
+class WebhookTests(unittest.TestCase):
+    def setUp(self):
+        self.user = make_user('payer')
+        self.order_id = unique_name('order_')
+        app.Payment.objects.create(user=self.user, order_id=self.order_id, payment_session_id='session', amount=2, plan='premium')
+
+    def post(self, body, timestamp=None, signature=None):
+        timestamp = timestamp or str(int(time.time() * 1000))
+        headers = {'x-webhook-timestamp': timestamp, 'x-webhook-signature': signature or sign(body, timestamp)}
+        with contextlib.redirect_stdout(io.StringIO()):
+            return Client().post('/payment-webhook/', body, content_type='application/json', headers=headers)
+
+    def body(self, payment_status='SUCCESS'):
+        return json.dumps({'data': {'order': {'order_id': self.order_id}, 'payment': {'payment_status': payment_status}}}).encode()
+
+    def status(self):
+        return app.Payment.objects.get(order_id=self.order_id).status
+
+    def test_signed_success_settles_the_payment(self):
+        self.assertEqual(self.post(self.body()).status_code, 200)
+        self.assertEqual(self.status(), 'success')
+        subscription = app.UserSubscription.objects.get(user=self.user)
+        self.assertEqual((subscription.plan, subscription.bugs_per_day), ('premium', -1))
+
+    def test_bad_signatures_are_refused(self):
+        body, now = self.body(), str(int(time.time() * 1000))
+        stale = str(int((time.time() - app.CASHFREE_WEBHOOK_TOLERANCE - 60) * 1000))
+        for timestamp, signature in [
+            (now, sign(body, now, secret='not-the-secret')),
+            (now, sign(body + b' ', now)),  # signed a different body
+            (stale, sign(body, stale)),  # replayed outside the tolerance
+            ('not-a-number', sign(body, 'not-a-number')),
+        ]:
+            self.assertEqual(self.post(body, timestamp, signature).status_code, 401)
+        self.assertEqual(self.status(), 'pending')
+
+    def test_failed_attempt_leaves_the_order_open(self):
+        self.assertEqual(self.post(self.body('FAILED')).status_code, 200)
+        self.assertEqual(self.status(), 'pending')
+
+    def test_garbled_body_is_a_400(self):
+        self.assertEqual(self.post(b'{"data": {}}').status_code, 400)
+
+
+class ApplyPaymentStatusTests(unittest.TestCase):
+    def setUp(self):
+        self.user = make_user('payer')
+        self.order_id = unique_name('order_')
+        app.Payment.objects.create(user=self.user, order_id=self.order_id, payment_session_id='session', amount=1, plan='basic')
+
+    def apply(self, order_status):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return app.apply_payment_status(self.order_id, order_status)
+
+    def test_repeats_upgrade_only_once(self):
+        self.assertEqual(self.apply('PAID'), 'success')
+        app.UserSubscription.objects.filter(user=self.user).update(bugs_used_today=3)
+        # A redelivered webhook, then the sweep: neither may reset the day's usage again
+        self.assertEqual(self.apply('PAID'), 'success')
+        self.assertEqual(self.apply('EXPIRED'), 'success')
+        subscription = app.UserSubscription.objects.get(user=self.user)
+        self.assertEqual((subscription.plan, subscription.bugs_per_day, subscription.bugs_used_today), ('basic', 5, 3))
+
+    def test_active_order_stays_pending(self):
+        self.assertEqual(self.apply('ACTIVE'), 'pending')
+        self.assertFalse(app.UserSubscription.objects.filter(user=self.user).exists())
+
+    def test_expired_order_fails_without_an_upgrade(self):
+        self.assertEqual(self.apply('EXPIRED'), 'failed')
+        self.assertEqual(self.apply('PAID'), 'failed')
+        self.assertFalse(app.UserSubscription.objects.filter(user=self.user).exists())
+
+    def test_unknown_order(self):
+        self.assertIsNone(app.apply_payment_status('no-such-order', 'PAID'))
+
+
+if __name__ == '__main__':
+    unittest.main()
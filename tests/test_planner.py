@@ -0,0 +1,82 @@
+"""The planner: per-assignee totals and the overdue / due-this-week lists."""
+import unittest
+from datetime import timedelta
+
+from helpers import app, client_for, make_group, make_user, setup_database, teardown_database
+from django.db import connection
+
+
+def setUpModule():
+    setup_database()
+
+
+def tearDownModule():
+    teardown_database()
+
+
+class PlannerTests(unittest.TestCase):
+    def setUp(self):
+        self.owner, self.alice, self.bob = make_user('owner'), make_user('alice'), make_user('bob')
+        self.group = make_group(self.owner, self.alice, self.bob)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE bug_groups_members SET role = 'developer' WHERE buggroup_id = %s AND user_id IN (%s, %s)",
+                [self.group.id, self.alice.id, self.bob.id]
+            )
+        app.invalidate_group_access(self.group.id)
+        day, start, week_end = app.planner_window()
+        overdue, this_week, later = start - timedelta(days=1), start + timedelta(hours=1), week_end + timedelta(days=7)
+        for title, assignee, due, hours, status in [
+            ('Alice overdue', self.alice, overdue, 3, 'Open'),
+            ('Alice this week', self.alice, this_week, 2, 'In Progress'),
+            ('Alice closed', self.alice, overdue, 40, 'Closed'),  # not open: counts nowhere
+            ('Bob later', self.bob, later, 5, 'Open'),
+            ('Unassigned overdue', None, overdue, 1, 'Open'),
+            ('Owner undated', self.owner, None, None, 'Open'),
+        ]:
+            app.Bug.objects.create(
+                title=title, description='', status=status, created_by='seed', group_id=self.group.id,
+                assigned_to_id=assignee.id if assignee else None, due_date=due, estimated_hours=hours,
+            )
+
+    def planner(self):
+        response = client_for(self.owner).get(f'/group/{self.group.id}/planner/')
+        self.assertEqual(response.status_code, 200)
+        return response.context['planner']
+
+    def row(self, user):
+        return next(row for row in self.planner()['workload'] if row['id'] == user.id)
+
+    def test_workload_totals(self):
+        totals = {
+            row['username']: (row['role'], row['open_bugs'], row['estimated_hours'], row['overdue_bugs'], row['due_this_week'])
+            for row in self.planner()['workload']
+        }
+        self.assertEqual(totals, {
+            self.alice.username: ('developer', 2, 5, 1, 1),
+            self.bob.username: ('developer', 1, 5, 0, 0),
+            self.owner.username: ('other', 1, 0, 0, 0),
+            'Unassigned': ('unassigned', 1, 1, 1, 0),
+        })
+
+    def test_due_lists(self):
+        sections = {section['title']: section for section in self.planner()['sections']}
+        overdue, this_week = sections['Overdue'], sections['Due This Week']
+        self.assertEqual([bug['title'] for bug in overdue['bugs']], ['Alice overdue', 'Unassigned overdue'])
+        self.assertEqual([bug['title'] for bug in this_week['bugs']], ['Alice this week'])
+        self.assertEqual((overdue['total'], this_week['total']), (2, 1))
+        self.assertEqual(overdue['bugs'][0]['assignee'], self.alice.username)
+
+    def test_totals_are_rebuilt_on_request(self):
+        self.planner()
+        app.Bug.objects.create(
+            title='Bob new', description='', status='Open', created_by='seed', group_id=self.group.id,
+            assigned_to_id=self.bob.id, estimated_hours=8,
+        )
+        self.assertEqual(self.row(self.bob)['estimated_hours'], 5)  # today's summary is kept...
+        app.rebuild_workload(group_id=self.group.id)
+        self.assertEqual(self.row(self.bob)['estimated_hours'], 13)  # ...until it is rebuilt
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""Rate limiting: an empty bucket is a 429 with Retry-After, per IP or per user."""
+import time
+import unittest
+from unittest import mock
+
+from helpers import app, client_for, make_user, setup_database, teardown_database, unique_name
+from django.db import connection
+from django.test import Client
+
+
+def setUpModule():
+    setup_database()
+
+
+def tearDownModule():
+    teardown_database()
+
+
+@mock.patch.object(app, 'RATE_LIMIT_ENABLED', True)
+class RateLimitTests(unittest.TestCase):
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM rate_limits')
+
+    def log_in(self, ip, **headers):
+        return Client(REMOTE_ADDR=ip).post('/', {'login': '1', 'username': 'nobody', 'password': 'wrong'}, headers=headers)
+
+    def test_auth_posts_are_limited_per_ip(self):
+        burst, interval = app.RATE_LIMIT_POLICIES['auth'][3]
+        for _ in range(burst):
+            self.assertEqual(self.log_in('10.0.0.1').status_code, 200)
+        refused = self.log_in('10.0.0.1')
+        self.assertEqual(refused.status_code, 429)
+        self.assertTrue(0 < int(refused['Retry-After']) <= interval + 1)
+        self.assertEqual(self.log_in('10.0.0.2').status_code, 200)
+        self.assertEqual(Client(REMOTE_ADDR='10.0.0.1').get('/').status_code, 200)  # only the POSTs are limited
+        self.assertIn('bugtracker_rate_limited_total{policy="auth"}', app.request_metrics.exposition())
+
+    def test_payment_orders_are_limited_per_user(self):
+        burst = app.RATE_LIMIT_POLICIES['payment_order'][3][0]
+        user, other = make_user('buyer'), make_user('buyer')
+        client = client_for(user)
+        for _ in range(burst):
+            self.assertEqual(client.post('/buy-bugs/', {'plan': 'none'}).status_code, 302)  # no gateway call
+        self.assertEqual(client.post('/buy-bugs/', {'plan': 'none'}).status_code, 429)
+        self.assertEqual(client_for(other).post('/buy-bugs/', {'plan': 'none'}).status_code, 302)
+
+    def test_bucket_refills(self):
+        bucket, now = unique_name('test:'), time.time()
+        with mock.patch('time.time', return_value=now):
+            self.assertEqual([app.take_token(bucket, 2, 10) for _ in range(2)], [0, 0])
+            self.assertAlmostEqual(app.take_token(bucket, 2, 10), 10, places=3)
+        with mock.patch('time.time', return_value=now + 4):
+            self.assertAlmostEqual(app.take_token(bucket, 2, 10), 6, places=3)
+        with mock.patch('time.time', return_value=now + 10):
+            self.assertEqual(app.take_token(bucket, 2, 10), 0)
+            self.assertGreater(app.take_token(bucket, 2, 10), 0)
+
+    def test_proxy_hops(self):
+        with mock.patch.object(app, 'RATE_LIMIT_PROXY_HOPS', 1):
+            burst = app.RATE_LIMIT_POLICIES['auth'][3][0]
+            for _ in range(burst):
+                self.log_in('10.0.0.3', **{'X-Forwarded-For': 'spoofed, 203.0.113.9'})
+            # The spoofable left-hand entry changes; the one the proxy added does not
+            self.assertEqual(self.log_in('10.0.0.3', **{'X-Forwarded-For': 'other, 203.0.113.9'}).status_code, 429)
+            self.assertEqual(self.log_in('10.0.0.3', **{'X-Forwarded-For': '203.0.113.10'}).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
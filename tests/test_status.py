@@ -0,0 +1,75 @@
+"""The bug status workflow: allowed moves are recorded, the others are a 409."""
+import unittest
+
+from helpers import app, client_for, make_group, make_user, setup_database, teardown_database
+from django.db import DatabaseError, connection, transaction
+
+
+def setUpModule():
+    setup_database()
+
+
+def tearDownModule():
+    teardown_database()
+
+
+class StatusWorkflowTests(unittest.TestCase):
+    def setUp(self):
+        self.owner, self.member = make_user('owner'), make_user('member')
+        self.group = make_group(self.owner, self.member)
+        self.client = client_for(self.member)
+        self.bug = app.Bug.objects.create(title='Flaky', description='', status='Open', created_by=self.owner.username, group_id=self.group.id)
+        self.url = f'/group/{self.group.id}/bug/{self.bug.id}/status/'
+
+    def events(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT group_id, from_status, to_status, changed_by_id FROM bug_status_events WHERE bug_id = %s ORDER BY id',
+                [self.bug.id]
+            )
+            return cursor.fetchall()
+
+    def status(self):
+        return app.Bug.objects.get(id=self.bug.id).status
+
+    def test_allowed_moves_are_recorded(self):
+        self.assertEqual(self.client.post(self.url, {'status': 'In Progress'}).status_code, 302)
+        self.assertEqual(self.client.post(self.url, {'status': 'Closed'}).status_code, 302)
+        self.assertEqual(self.status(), 'Closed')
+        self.assertEqual(self.events(), [
+            (self.group.id, 'Open', 'In Progress', self.member.id),
+            (self.group.id, 'In Progress', 'Closed', self.member.id),
+        ])
+        history = app.get_bug_status_history(self.bug.id)
+        self.assertEqual([(event['to_status'], event['changed_by']) for event in history], [
+            ('In Progress', self.member.username), ('Closed', self.member.username),
+        ])
+
+    def test_disallowed_move_is_a_409(self):
+        self.client.post(self.url, {'status': 'Closed'})
+        response = self.client.post(self.url, {'status': 'Resolved'})
+        self.assertEqual(response.status_code, 409)
+        self.assertIn(b'cannot move from Closed to Resolved', response.content)
+        self.assertEqual(self.status(), 'Closed')
+        self.assertEqual(len(self.events()), 1)
+
+    def test_unknown_status_and_bug(self):
+        self.assertEqual(self.client.post(self.url, {'status': 'Wontfix'}).status_code, 409)
+        self.assertEqual(self.client.post(f'/group/{self.group.id}/bug/{self.bug.id + 1000}/status/', {'status': 'Closed'}).status_code, 404)
+        self.assertEqual(self.events(), [])
+
+    def test_legacy_status_may_move_anywhere(self):
+        app.Bug.objects.filter(id=self.bug.id).update(status='Triage')
+        self.assertEqual(self.client.post(self.url, {'status': 'Resolved'}).status_code, 302)
+        self.assertEqual(self.events(), [(self.group.id, 'Triage', 'Resolved', self.member.id)])
+
+    def test_history_is_append_only(self):
+        self.client.post(self.url, {'status': 'Resolved'})
+        for statement in ("UPDATE bug_status_events SET to_status = 'Open' WHERE bug_id = %s", 'DELETE FROM bug_status_events WHERE bug_id = %s'):
+            with self.assertRaises(DatabaseError), transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(statement, [self.bug.id])
+        self.assertEqual(len(self.events()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,219 @@
+"""The tracker's views, end to end through the Django test client.
+
+Runs on SQLite by default, and on PostgreSQL when DATABASE_URL points at a server (see
+helpers.setup_database).
+
+    python -m unittest discover tests
+    DATABASE_URL='postgresql://postgres@/tracker?host=/var/run/postgresql' python -m unittest discover tests
+"""
+import os
+import re
+import threading
+import time
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from helpers import app, client_for, make_group, make_user, setup_database, teardown_database, unique_name
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, connections, transaction
+from django.test import Client, RequestFactory
+from django.utils.timezone import localdate
+
+
+def setUpModule():
+    setup_database()
+
+
+def tearDownModule():
+    teardown_database()
+
+
+def bug_titles(response):
+    return re.findall(r'<strong>([^<]*)</strong><br>', response.context['bug_rows'])
+
+
+class GroupFlowTests(unittest.TestCase):
+    """One group per test: an owner who created it, and a member who joined by invitation"""
+
+    def setUp(self):
+        self.owner, self.member = make_user('owner'), make_user('member')
+        self.owner_client, self.member_client = client_for(self.owner), client_for(self.member)
+        name = unique_name('group')
+        self.owner_client.post('/create-group/', {'name': name, 'description': 'test group'})
+        self.group = app.BugGroup.objects.get(name=name)
+        self.owner_client.post(f'/manage-group/{self.group.id}/', {'invite_user': '1', 'username': self.member.username})
+        invitation = app.GroupInvitation.objects.get(group=self.group, invited_user=self.member, status='pending')
+        self.member_client.post('/notifications/', {'invitation_id': invitation.id, 'action': 'accept'})
+
+    def add_bug(self, client, **fields):
+        data = {'title': 'A bug', 'description': '', 'status': 'Open', 'add_bug': '1'}
+        data.update(fields)
+        return client.post(f'/group/{self.group.id}/', data)
+
+    def test_invite_and_accept(self):
+        outsider = make_user('outsider')
+        self.assertEqual(self.owner_client.get(f'/group/{self.group.id}/').status_code, 200)
+        response = self.member_client.get(f'/group/{self.group.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.member.username, [member['username'] for member in response.context['members']])
+
+        self.owner_client.post(f'/manage-group/{self.group.id}/', {'invite_user': '1', 'username': outsider.username})
+        self.assertEqual(client_for(outsider).get('/').context['pending_invitations'], 1)
+        self.assertEqual(client_for(outsider).get(f'/group/{self.group.id}/').status_code, 302)
+
+    def test_bulk_invite_and_accept_all(self):
+        invitees = [make_user('bulk') for _ in range(3)]
+        other_group = make_group(self.owner)
+        names = ', '.join(user.username for user in invitees)
+        for group in (self.group, other_group, self.group):  # the repeat must not invite anyone twice
+            self.owner_client.post(f'/manage-group/{group.id}/', {'invite_user': '1', 'username': f'{names}\nnobody-here'})
+        self.assertEqual(app.GroupInvitation.objects.filter(invited_user=invitees[0], status='pending').count(), 2)
+
+        client = client_for(invitees[0])
+        self.assertEqual(client.get('/').context['pending_invitations'], 2)
+        client.post('/notifications/', {'action': 'accept_all'})
+        self.assertEqual(client.get('/').context['pending_invitations'], 0)
+        for group in (self.group, other_group):
+            self.assertEqual(client.get(f'/group/{group.id}/').status_code, 200)
+
+    def test_add_bug_and_daily_quota(self):
+        self.assertEqual(self.add_bug(self.member_client, title='First bug').status_code, 302)
+        response = self.add_bug(self.member_client, title='Second bug')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Daily bug limit reached', response.context['error'])
+        self.assertEqual(bug_titles(self.member_client.get(f'/group/{self.group.id}/')), ['First bug'])
+
+    def test_paging(self):
+        # Newest first: 'Paged bug 0' is inserted last
+        app.Bug.objects.bulk_create([
+            app.Bug(title=f'Paged bug {i}', description='', status='Open', created_by='seed', group_id=self.group.id)
+            for i in reversed(range(app.BUGS_PAGE_SIZE + 5))
+        ])
+        first = self.member_client.get(f'/group/{self.group.id}/')
+        self.assertEqual(len(bug_titles(first)), app.BUGS_PAGE_SIZE)
+        self.assertEqual(bug_titles(first)[0], 'Paged bug 0')
+        second = self.member_client.get(f'/group/{self.group.id}/', {'after': first.context['older_cursor']})
+        self.assertEqual(bug_titles(second), [f'Paged bug {i}' for i in range(app.BUGS_PAGE_SIZE, app.BUGS_PAGE_SIZE + 5)])
+        self.assertIsNone(second.context['older_cursor'])
+        garbled = self.member_client.get(f'/group/{self.group.id}/', {'after': '99999999999999999999999.1'})
+        self.assertEqual(garbled.status_code, 200)
+
+    def test_search(self):
+        self.add_bug(self.member_client, title='Crash on login page', description='safari crashes badly')
+        response = self.member_client.get(f'/group/{self.group.id}/search/', {'q': 'saf cras'})
+        self.assertEqual([bug['title'] for bug in response.context['results']], ['Crash on login page'])
+
+    def test_attachment(self):
+        content = b'\x89PNG\r\n\x1a\n' + b'x' * 300
+        self.add_bug(self.member_client, title='With attachment', attachment=SimpleUploadedFile('shot.png', content))
+        bug = app.Bug.objects.get(group_id=self.group.id, title='With attachment')
+        url = f'/group/{self.group.id}/bug/{bug.id}/attachment/'
+        blob = os.path.join(settings.MEDIA_ROOT, str(bug.attachment))
+        self.assertEqual(os.stat(blob).st_mode & 0o777, 0o644)  # readable by an X-Accel-Redirect front end
+
+        response = self.owner_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), content)
+        # Not sniffed yet (no job worker here): a download, whatever the file name says
+        self.assertEqual(response['Content-Type'], 'application/octet-stream')
+        self.assertTrue(response['Content-Disposition'].startswith('attachment'))
+
+        partial = self.owner_client.get(url, headers={'Range': 'bytes=0-7'})
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(b''.join(partial.streaming_content), content[:8])
+        self.assertEqual(client_for(make_user('outsider')).get(url).status_code, 404)
+
+    def test_download_name_is_quoted(self):
+        name = 'report "final";\r\nX-Injected: 1 ü.txt'
+        with open(os.path.join(settings.MEDIA_ROOT, name), 'wb') as f:
+            f.write(b'data')
+        response = app.serve_attachment(RequestFactory().get('/'), name)
+        response.close()
+        disposition = response['Content-Disposition']
+        self.assertTrue(disposition.startswith('attachment; filename*=utf-8\'\''))
+        self.assertNotIn('"final"', disposition)
+        self.assertNotIn('\n', disposition)
+
+    def test_leave(self):
+        self.member_client.post(f'/group/{self.group.id}/', {'leave_group': '1'})
+        self.assertEqual(self.member_client.get(f'/group/{self.group.id}/').status_code, 302)
+        response = self.owner_client.get(f'/manage-group/{self.group.id}/')
+        self.assertNotIn(self.member.username, [member['username'] for member in response.context['members']])
+
+
+class QuotaTests(unittest.TestCase):
+    def test_one_bug_a_day_on_the_free_plan(self):
+        user = make_user('quota')
+        self.assertEqual(app.consume_bug_quota(user.id)['bugs_used_today'], 1)
+        self.assertIsNone(app.consume_bug_quota(user.id))
+
+    def test_expired_plan_is_downgraded(self):
+        user = make_user('expired')
+        app.consume_bug_quota(user.id)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE user_subscriptions SET plan = 'premium', bugs_per_day = 999, subscription_expires = %s, last_reset_date = %s WHERE user_id = %s",
+                ['2020-02-01', '2020-01-01', user.id]
+            )
+        subscription = app.consume_bug_quota(user.id)
+        self.assertEqual((subscription['plan'], subscription['bugs_used_today']), ('free', 1))
+        self.assertIsNone(app.consume_bug_quota(user.id))
+
+    def test_counter_resets_on_the_local_day(self):
+        user = make_user('tz')
+        today = localdate()
+        with mock.patch.object(app, 'localdate', return_value=today):
+            app.consume_bug_quota(user.id)
+            self.assertIsNone(app.consume_bug_quota(user.id))
+            self.assertEqual(app.get_or_reset_subscription(user.id)['bugs_used_today'], 1)
+        with mock.patch.object(app, 'localdate', return_value=today + timedelta(days=1)):
+            self.assertEqual(app.get_or_reset_subscription(user.id)['bugs_used_today'], 0)
+            self.assertEqual(app.consume_bug_quota(user.id)['bugs_used_today'], 1)
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'SQLite serializes writers, so there is no race to lose')
+    def test_concurrent_takes_cannot_overshoot(self):
+        user = make_user('race')
+        app.consume_bug_quota(user.id)
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE user_subscriptions SET bugs_used_today = 0 WHERE user_id = %s', [user.id])
+        results = []
+
+        def take(hold):
+            try:
+                with transaction.atomic():
+                    results.append(app.consume_bug_quota(user.id))
+                    time.sleep(hold)  # keep the row locked while the other one waits
+            finally:
+                connections.close_all()
+
+        first = threading.Thread(target=take, args=(0.5,))
+        first.start()
+        time.sleep(0.1)
+        second = threading.Thread(target=take, args=(0,))
+        second.start()
+        first.join()
+        second.join()
+        self.assertEqual(sum(result is not None for result in results), 1)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT bugs_used_today FROM user_subscriptions WHERE user_id = %s', [user.id])
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+
+class MetricsTests(unittest.TestCase):
+    def test_off_without_a_token(self):
+        with mock.patch.object(app, 'METRICS_TOKEN', ''):
+            self.assertEqual(Client().get('/metrics').status_code, 404)
+
+    def test_bearer_token(self):
+        with mock.patch.object(app, 'METRICS_TOKEN', 'scrape-me'):
+            self.assertEqual(Client().get('/metrics').status_code, 401)
+            self.assertEqual(Client().get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code, 401)
+            response = Client().get('/metrics', headers={'Authorization': 'Bearer scrape-me'})
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(b'# TYPE', response.content)
+
+
+if __name__ == '__main__':
+    unittest.main()